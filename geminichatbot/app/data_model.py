@@ -8,6 +8,7 @@ COMMON_DATE = ["date","txn_date","transaction_date","posted_date"]
 COMMON_AMT  = ["amount","amt","transaction_amount","debit","debit_amount","inr_amount"]
 COMMON_CAT  = ["category","cat","bucket"]
 COMMON_DESC = ["description","narration","merchant","details","remarks"]
+COMMON_MODE = ["mode","mode of transaction","mode_of_transaction","payment_mode","channel"]
 
 def detect_columns(df: pd.DataFrame) -> Dict[str, Optional[str]]:
     cols = {c.lower().strip(): c for c in df.columns}
@@ -20,6 +21,7 @@ def detect_columns(df: pd.DataFrame) -> Dict[str, Optional[str]]:
         "amount": pick(COMMON_AMT),
         "category": pick(COMMON_CAT),
         "description": pick(COMMON_DESC),
+        "mode": pick(COMMON_MODE),
     }
 
 def load_expense_csv(file_bytes: bytes) -> pd.DataFrame:
@@ -27,9 +29,22 @@ def load_expense_csv(file_bytes: bytes) -> pd.DataFrame:
     df = pd.read_csv(BytesIO(file_bytes))
     return df
 
+def _constant(value: str, index: pd.Index) -> pd.Series:
+    # single-category column without materializing one Python object per row
+    codes = np.zeros(len(index), dtype=np.int8)
+    return pd.Series(pd.Categorical.from_codes(codes, [value]), index=index)
+
 def normalize_expenses(df: pd.DataFrame) -> pd.DataFrame:
-    # Ensure amounts are negative outflows internally
+    """
+    Build a compact frame holding only the columns summarize() needs; the
+    caller's frame is left untouched. Amounts are nullable int64 paise
+    (negative outflows), dates datetime64, and month/category/description/
+    mode are categoricals.
+    """
     cols = detect_columns(df)
+    out = {}
+
+    # Ensure amounts are negative outflows internally
     amt = cols["amount"]
     if amt is None:
         # try debit/credit columns
@@ -37,51 +52,72 @@ def normalize_expenses(df: pd.DataFrame) -> pd.DataFrame:
         dr = lower.get("debit") or lower.get("debit_amount")
         cr = lower.get("credit") or lower.get("credit_amount")
         if dr and cr:
-            df["__amount"] = pd.to_numeric(df[dr], errors="coerce").fillna(0) * -1.0
-            amt = "__amount"
+            rupees = pd.to_numeric(df[dr], errors="coerce").fillna(0) * -1.0
         else:
-            df["__amount"] = 0.0
-            amt = "__amount"
+            rupees = pd.Series(0.0, index=df.index)
     else:
-        df[amt] = pd.to_numeric(df[amt], errors="coerce")
+        rupees = pd.to_numeric(df[amt], errors="coerce").astype("float64")
         # if mostly positive, make them negative (expense-only file)
-        if (df[amt] > 0).mean() > 0.5:
-            df[amt] = -df[amt].abs()
+        if (rupees > 0).mean() > 0.5:
+            rupees = -rupees.abs()
+    # non-finite or beyond-int64 amounts become NA instead of failing the cast
+    paise = rupees.mul(100).round()
+    out["__paise"] = paise.where(paise.abs() < 2.0 ** 63).astype("Int64")
 
     # dates
-    dcol = cols["date"]
-    if dcol:
-        df[dcol] = pd.to_datetime(df[dcol], errors="coerce")
+    dcol = cols["date"] or "__date"
+    if cols["date"]:
+        dates = pd.to_datetime(df[dcol], errors="coerce")
+    else:
+        dates = pd.Series(pd.NaT, index=df.index, dtype="datetime64[ns]")
+    out[dcol] = dates
+
+    # month key: stringify each distinct period once (same labels, NaT included,
+    # as a per-row astype(str)) and spread them back as categorical codes
+    if dates.notna().any():
+        codes, periods = pd.factorize(dates.dt.to_period("M"), use_na_sentinel=False)
+        labels = pd.Categorical(pd.Series(periods).astype(str))
+        out["__month"] = pd.Series(labels.take(codes), index=df.index)
     else:
-        df["__date"] = pd.NaT
-        dcol = "__date"
+        out["__month"] = _constant("Unknown", df.index)
 
-    # month key
-    df["__month"] = df[dcol].dt.to_period("M").astype(str) if df[dcol].notna().any() else "Unknown"
     # category
     ccol = cols["category"] or "__category"
-    if ccol not in df.columns:
-        df["__category"] = "Uncategorized"
-        ccol = "__category"
+    if cols["category"]:
+        out[ccol] = df[ccol].astype("category")
+    else:
+        out[ccol] = _constant("Uncategorized", df.index)
 
     # description
     desc = cols["description"] or "__desc"
-    if desc not in df.columns:
-        df["__desc"] = ""
-        desc = "__desc"
+    if cols["description"]:
+        out[desc] = df[desc].astype("category")
+    else:
+        out[desc] = _constant("", df.index)
 
-    return df, {"amount": amt, "date": dcol, "month": "__month", "category": ccol, "description": desc}
+    # payment mode (not summarized, kept for callers)
+    mode = cols["mode"]
+    if mode:
+        out[mode] = df[mode].astype("category")
+
+    return pd.DataFrame(out, index=df.index), {
+        "amount": "__paise", "date": dcol, "month": "__month",
+        "category": ccol, "description": desc, "mode": mode,
+    }
 
 def summarize(df: pd.DataFrame, cols: Dict[str,str]) -> Dict[str, Any]:
     amt = cols["amount"]; month = cols["month"]; cat = cols["category"]; desc = cols["description"]
+    # amounts are integer paise; sums stay exact and are converted to rupees here
+    def rupees(s: pd.Series) -> pd.Series:
+        return s.astype("float64").div(100.0)
     # totals
-    total_outflow = float(-df[amt].sum())  # positive number
-    months = df.groupby(month)[amt].sum().mul(-1.0).rename("spend").reset_index()
-    cats = df.groupby(cat)[amt].sum().mul(-1.0).rename("spend").reset_index().sort_values("spend", ascending=False)
+    total_outflow = float(-df[amt].sum()) / 100.0  # positive number
+    months = rupees(df.groupby(month, observed=True)[amt].sum()).mul(-1.0).rename("spend").reset_index()
+    cats = rupees(df.groupby(cat, observed=True)[amt].sum()).mul(-1.0).rename("spend").reset_index().sort_values("spend", ascending=False)
     # recurring merchants (heuristic: >=3 occurrences)
-    rec = df.groupby(desc)[amt].agg(["count","sum"]).reset_index().sort_values("count", ascending=False)
+    rec = df.groupby(desc, observed=True)[amt].agg(["count","sum"]).reset_index().sort_values("count", ascending=False)
     rec = rec[rec["count"]>=3].head(20).rename(columns={"sum":"total_spend","count":"occurrences"})
-    rec["total_spend"] = rec["total_spend"].mul(-1.0)
+    rec["total_spend"] = rupees(rec["total_spend"]).mul(-1.0)
 
     # essentials/discretionary tagging from category keywords
     def tag(s: str)->str:
@@ -1,6 +1,8 @@
 # streamlit_app.py
 import os
 import json
+import hashlib
+from typing import Optional
 import pandas as pd
 import streamlit as st
 from dotenv import load_dotenv, find_dotenv
@@ -38,6 +40,35 @@ def configure_gemini() -> str:
     preferred = ["gemini-1.5-pro", "gemini-1.5-flash", "gemini-1.5-flash-8b"]
     return next((m for m in preferred if m in names), (names[0] if names else "gemini-1.5-flash"))
 
+# ------------------------- Cached computation -------------------------
+# Streamlit reruns this script on every interaction; keep the heavy parsing and
+# summarizing keyed by the upload's content hash so chat turns and chart toggles
+# reuse it. Arguments prefixed with "_" are excluded from the cache key.
+CACHE_ENTRIES = 4
+
+def upload_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner="Crunching your expenses…")
+def load_profile(digest: str, _data: bytes) -> dict:
+    """Parse, normalize and summarize an upload once per content hash."""
+    df = load_expense_csv(_data)
+    dfn, cols = normalize_expenses(df)
+    return {"rows": len(dfn), "profile": summarize(dfn, cols)}
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner=False)
+def chart_data(digest: str, _profile: dict) -> tuple:
+    """Series for the month/category charts (None when there is nothing to plot)."""
+    by_month = pd.DataFrame(_profile["by_month"])
+    by_cat = pd.DataFrame(_profile["by_category"])
+    month_spend = None if by_month.empty else by_month.set_index("__month")["spend"]
+    cat_spend = None if by_cat.empty else by_cat.set_index("category")["spend"].head(15)
+    return month_spend, cat_spend
+
+@st.cache_data(max_entries=CACHE_ENTRIES * 4, show_spinner=False)
+def context_block(digest: str, income: Optional[float], _profile: dict) -> str:
+    return build_context_block(_profile, income)
+
 SYSTEM = (
     "You are a friendly personal finance copilot for India-focused users.\n"
     "The user uploads a CSV that contains only OUTGOING transactions (expenses). Income is asked separately.\n"
@@ -64,15 +95,18 @@ if "history" not in st.session_state: st.session_state["history"] = []   # [{rol
 if "profile" not in st.session_state: st.session_state["profile"] = None
 if "income" not in st.session_state: st.session_state["income"] = None
 if "mem_summary" not in st.session_state: st.session_state["mem_summary"] = ""  # memory-lite summary text
+if "digest" not in st.session_state: st.session_state["digest"] = None  # content hash of the current upload
 
 # ------------------------- CSV Load -------------------------
 if uploaded is not None:
-    df = load_expense_csv(uploaded.getvalue())
-    dfn, cols = normalize_expenses(df)
-    profile = summarize(dfn, cols)
+    data = uploaded.getvalue()
+    digest = upload_digest(data)
+    loaded = load_profile(digest, data)
+    profile = loaded["profile"]
     st.session_state["profile"] = profile
+    st.session_state["digest"] = digest
 
-    st.success(f"Loaded {len(dfn)} rows. Total outflow: ₹{profile['total_outflow']:,.0f}")
+    st.success(f"Loaded {loaded['rows']} rows. Total outflow: ₹{profile['total_outflow']:,.0f}")
 
     # Ask for monthly income if missing (since CSV has only expenses)
     if st.session_state["income"] is None:
@@ -86,15 +120,11 @@ else:
 # ------------------------- Charts -------------------------
 if uploaded is not None and st.session_state["profile"] and show_charts:
     st.subheader("Charts")
-    prof = st.session_state["profile"]
-
-    by_month = pd.DataFrame(prof["by_month"])
-    if not by_month.empty:
-        st.line_chart(by_month.set_index("__month")["spend"])
-
-    by_cat = pd.DataFrame(prof["by_category"])
-    if not by_cat.empty:
-        st.bar_chart(by_cat.set_index("category")["spend"].head(15))
+    month_spend, cat_spend = chart_data(st.session_state["digest"], st.session_state["profile"])
+    if month_spend is not None:
+        st.line_chart(month_spend)
+    if cat_spend is not None:
+        st.bar_chart(cat_spend)
 
 st.markdown("---")
 st.subheader("Chat")
@@ -115,7 +145,9 @@ if q and not disabled:
         st.markdown(q)
 
     # Build context block from current profile + income
-    ctx_block = build_context_block(st.session_state["profile"], st.session_state["income"])
+    ctx_block = context_block(
+        st.session_state["digest"], st.session_state["income"], st.session_state["profile"]
+    )
 
     # Memory-lite: refresh summary every ~5 turns (after a new user msg)
     turns = [m for m in st.session_state["history"] if m["role"] in ("user", "assistant")]
@@ -4,6 +4,7 @@ from langchain.prompts import PromptTemplate
 from langchain.chains import LLMChain
 from dotenv import load_dotenv
 import os
+from merchant_index import MerchantIndex, SIM_THRESHOLD
 
 load_dotenv()
 # Load CSV
@@ -16,6 +17,14 @@ df = pd.read_csv(input_file)
 # Unique merchant names
 merchants = df["Receiver Name"].fillna("").unique().tolist()
 
+# Local nearest-neighbour lookup against previously categorized merchants;
+# only the low-confidence ones go to Gemini
+index = MerchantIndex.load()
+local_map = index.categorize(merchants, threshold=SIM_THRESHOLD)
+pending = [m for m in merchants if m not in local_map]
+print(f"Local index ({len(index)} known merchants) matched {len(local_map)}/{len(merchants)}; "
+      f"sending {len(pending)} to Gemini")
+
 # Initialize Gemini
 llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash")
 
@@ -36,16 +45,21 @@ Merchants:
 
 chain = LLMChain(llm=llm, prompt=prompt)
 
-# Prepare merchant text chunk
-merchant_text = "\n".join([f"- {m}" for m in merchants])
+df_map = pd.DataFrame(list(local_map.items()), columns=["Receiver Name","category"])
+df_llm = pd.DataFrame(columns=["Receiver Name","category"])
+
+if pending:
+    # Prepare merchant text chunk
+    merchant_text = "\n".join([f"- {m}" for m in pending])
 
-# Get classified response
-response = chain.run(merchant_list=merchant_text)
-print("LLM Output:\n", response)
+    # Get classified response
+    response = chain.run(merchant_list=merchant_text)
+    print("LLM Output:\n", response)
 
-# Convert model output to dataframe
-lines = [x.strip() for x in response.split("\n") if "," in x]
-df_map = pd.DataFrame([line.split(",") for line in lines], columns=["Receiver Name","category"])
+    # Convert model output to dataframe
+    lines = [x.strip() for x in response.split("\n") if "," in x]
+    df_llm = pd.DataFrame([line.split(",") for line in lines], columns=["Receiver Name","category"])
+    df_map = pd.concat([df_map, df_llm], ignore_index=True)
 
 # Merge with original
 df_final = df.merge(df_map, on="Receiver Name", how="left")
@@ -53,5 +67,11 @@ df_final = df.merge(df_map, on="Receiver Name", how="left")
 # Save new CSV
 df_final.to_csv("Bank_transaction_categorized.csv", index=False)
 
+# Remember Gemini's labels for the merchants we sent it; local guesses are not
+# fed back, so a wrong neighbour vote never becomes an exact match
+labeled = df_llm[df_llm["Receiver Name"].isin(pending)]
+index.learn(labeled["Receiver Name"], labeled["category"].astype(str))
+index.save()
+
 print("\nCategorization complete!")
 print("Output file: Bank_transaction_categorized.csv")